@@ -17,7 +17,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from bitfile import BitFile
+from .bitfile import BitFile
 
 __author__ = "Michael Dipperstein <mdipperstein@gmail.com>"
 __license__ = "GPL"
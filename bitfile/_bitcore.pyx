@@ -0,0 +1,145 @@
+# cython: language_level=3
+"""Optional C accelerated code packing for BitFile.
+************************************************************************
+
+    File    : _bitcore.pyx
+    Purpose : This file implements the inner loop of
+              BitFile.put_bits_stream in C.  It is built if Cython is
+              available when the package is installed.  BitFile falls
+              back to pure python when it isn't.
+    Author  : bitfile contributors
+
+************************************************************************
+
+bitfile: A python I/O class for files containing arbitrary data sizes.
+Copyright (C) 2010
+      Michael Dipperstein (mdipperstein@gmail.com)
+
+This file is part of bitfile.
+
+Bitfile is free software; you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the
+Free Software Foundation; either version 3 of the License, or (at your
+option) any later version.
+
+Bitfile is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from cpython.long cimport PyLong_AsUnsignedLongLongMask
+from libc.stdint cimport uint64_t
+
+cdef enum:
+    # Widest code that fits in the 64 bit accumulator with 7 buffered bits.
+    MAX_C_COUNT = 56
+
+
+def put_codes(codes, bytearray byte_buf, bytearray bit_buf,
+              Py_ssize_t flush_size, flush):
+    """Pack a sequence of codes into a byte buffer.
+
+    This function packs each (bits, count) pair in codes exactly as
+    BitFile.put_bits(bits, count) would.  Completed bytes are appended
+    to byte_buf and the leftover bits are kept in bit_buf.  Whenever
+    byte_buf holds flush_size or more bytes, flush is called to write
+    them out, so byte_buf stays bounded however long codes is.
+
+    Arguments:
+        codes - an iterable of (bits, count) pairs.
+        byte_buf - the bytearray that completed bytes are appended to.
+        bit_buf - a BitFile [bit_count, buffered_bits] buffer.  It holds
+                  the bits preceding the first code on entry.
+        flush_size - the byte_buf length that triggers a flush.
+        flush - a callable that writes out and empties byte_buf.
+
+    Return Value(s):
+        The total number of bits written.
+
+    Side Effects:
+        Bytes are appended to byte_buf and flush may be called.
+        bit_buf is updated, even if an exception is raised.
+
+    Exceptions Raised:
+        TypeError - Raised if any bits is not an integer object.
+                    Codes preceding it will have been written.
+        Any exception raised by flush.
+
+    """
+
+    cdef int nbits = bit_buf[0]
+    cdef uint64_t acc = bit_buf[1] & ((1 << nbits) - 1)
+    cdef uint64_t v, rev
+    cdef int count, whole, remaining, i
+    cdef Py_ssize_t total = 0
+
+    # A python integer one, so that wide masks aren't computed in C.
+    one = 1
+
+    try:
+        for bits, c in codes:
+            if not isinstance(bits, int):
+                raise TypeError('Bits must be in integer type')
+
+            count = c
+
+            if count > MAX_C_COUNT:
+                # Too wide for the accumulator, use python integers.
+                byte_count = c >> 3
+                remaining = count & 0x07
+                ba = (bits & ((one << (8 * byte_count)) - 1)).to_bytes(
+                    byte_count, 'little')
+                big = (int.from_bytes(ba, 'big') << remaining) | \
+                    ((bits >> (8 * byte_count)) & ((1 << remaining) - 1))
+                big = big | (int(acc) << c)
+                nbits = nbits + count
+                whole = nbits >> 3
+                nbits = nbits & 0x07
+                byte_buf += (big >> nbits).to_bytes(whole, 'big')
+                acc = big & ((1 << nbits) - 1)
+                total = total + count
+
+                if len(byte_buf) >= flush_size:
+                    flush()
+                continue
+
+            if count < 0:
+                raise ValueError('negative shift count')
+
+            v = PyLong_AsUnsignedLongLongMask(bits)
+            v = v & ((<uint64_t>1 << count) - 1)
+
+            if count > 8:
+                # put_bits writes whole bytes LSByte first, then the
+                # remaining msbits.  Reorder the code to match.
+                whole = count >> 3
+                remaining = count & 0x07
+                rev = 0
+
+                for i in range(whole):
+                    rev = (rev << 8) | ((v >> (8 * i)) & 0xFF)
+
+                v = (rev << remaining) | \
+                    ((v >> (8 * whole)) & ((1 << remaining) - 1))
+
+            acc = (acc << count) | v
+            nbits = nbits + count
+            total = total + count
+
+            while nbits >= 8:
+                nbits = nbits - 8
+                byte_buf.append((acc >> nbits) & 0xFF)
+
+            acc = acc & ((1 << nbits) - 1)
+
+            if len(byte_buf) >= flush_size:
+                flush()
+    finally:
+        bit_buf[0] = nbits
+        bit_buf[1] = acc & 0xFF
+
+    return total
@@ -33,6 +33,38 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 import errno
+import os
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional.  Everything works without it, just slower.
+    njit = None
+
+try:
+    if __package__:
+        from . import _bitcore
+    else:
+        # Not imported as part of the package, e.g. by sample.py's
+        # doctest run from this directory.
+        import _bitcore
+except ImportError:
+    # The C extension is optional too.  It's only built with Cython.
+    _bitcore = None
+
+# Number of bytes collected in the byte buffer before it's written out.
+_BYTE_BUF_SIZE = 65536
+
+# Smallest read that is worth the overhead of calling numba compiled code.
+_JIT_MIN_BYTES = 256
+
+# Lookup tables indexed by a bit count (0 - 8).
+# _LSHIFT[n] is the left shift that moves n lsbits to the msbits (8 - n).
+# _ONE_FILL[n] has the 8 - n lsbits set (fills the spare bits).
+# _LOW_MASK[n] has the n lsbits set.
+_LSHIFT = tuple(range(8, -1, -1))
+_ONE_FILL = tuple(0xFF >> n for n in range(9))
+_LOW_MASK = tuple((1 << n) - 1 for n in range(9))
 
 
 def int_to_bytearray(value, length):
@@ -58,11 +90,78 @@ def int_to_bytearray(value, length):
 
     """
 
-    ba = bytearray(length)
-    for i in range(length):
-        ba[length - i - 1] = value & 0xFF
-        value = value >> 8
-    return ba
+    # Mask off anything that doesn't fit so to_bytes can't overflow.
+    value = value & ((1 << (8 * length)) - 1)
+    return bytearray(value.to_bytes(length, 'big'))
+
+
+def _merge_bytes(out, src, shift, carry):
+    """Merge buffered bits into a block of bytes.
+
+    This is a helper function that shifts the bytes in src right by
+    shift bits, fills the vacated msbits from the previous byte, and
+    stores the results in out.  carry holds the bits that precede
+    src[0].  It is only called compiled by numba, for blocks of
+    _JIT_MIN_BYTES or more.  Smaller blocks use _shift_bytes.
+
+    Arguments:
+        out - A bytearray at least as long as src for the results.
+        src - The bytes to be merged.
+        shift - The number of buffered bits (1 - 7).
+        carry - The byte holding the buffered bits as its lsbits.
+
+    Return Value(s):
+        The last byte of src, which holds the new buffered bits.
+
+    Side Effects:
+        out[0:len(src)] is overwritten.
+
+    Exceptions Raised:
+        None.
+
+    """
+
+    for i in range(len(src)):
+        c = src[i]
+        out[i] = ((carry << (8 - shift)) | (c >> shift)) & 0xFF
+        carry = c
+    return carry
+
+
+def _shift_bytes(src, shift, carry):
+    """Merge buffered bits into a block of bytes with integer math.
+
+    This is a helper function that produces the same bytes as
+    _merge_bytes.  The whole block is shifted as one integer, so the
+    work is done in C whatever its length, without a python loop.
+
+    Arguments:
+        src - The bytes to be merged.
+        shift - The number of buffered bits (1 - 7).
+        carry - The byte holding the buffered bits as its lsbits.
+
+    Return Value(s):
+        A bytes object containing the merged bytes.  The last byte of
+        src holds the new buffered bits.
+
+    Side Effects:
+        None.
+
+    Exceptions Raised:
+        None.
+
+    """
+
+    count = len(src)
+    value = ((carry & _LOW_MASK[shift]) << (8 * count)) | \
+        int.from_bytes(src, 'big')
+    return (value >> shift).to_bytes(count, 'big')
+
+
+if njit is not None:
+    _jit_merge_bytes = njit(cache=True)(_merge_bytes)
+else:
+    _jit_merge_bytes = None
 
 
 class BitFile:
@@ -71,6 +170,13 @@ class BitFile:
 
     Methods:
         _verify_opened - Raise a ValueError if the file is not open.
+        _reset_buf - Zeros an input or output buffer.
+        _write_bytes - Adds bytes to the byte buffer.
+        _flush_byte_buf - Writes the byte buffer to the file stream.
+        _get_byte - Reads a byte from the input stream as an integer.
+        _put_byte - Writes a byte to the output stream from an integer.
+        _read_bytes - Reads a block of bytes from the input stream.
+        _put_bytes - Writes a block of bytes to the output stream.
         open - Opens an input or output bit file stream.
         close - Closes an opened input or output bit file stream.
         byte_align - Writes out buffered bits + enough spare bits to
@@ -78,6 +184,8 @@ class BitFile:
         flush - Flushes the output stream.
         get_char - Reads a character from the input stream.
         put_char - Writes a character to the output stream.
+        get_chars - Reads multiple characters from the input stream.
+        put_chars - Writes multiple characters to the output stream.
         get_bit - Reads a bit from the input stream.
         put_bit - Writes a bit to the output stream.
         get_bits_mtol - Reads multiple bits from the input stream
@@ -88,15 +196,34 @@ class BitFile:
             (LSB to MSB).
         put_bits_ltom - Writes multiple bits to the output stream
             (LSB to MSB).
+        put_bits_stream - Writes a sequence of codes to the output
+            stream.
+        put_bits_many - Writes a sequence of values, each with its own
+            width, to the output stream.
 
     Instance Variables:
         _stream - A pointer to the file stream.
         _mode - The mode of the file stream (read, write, append, ...)
+        _readable - True if the file stream was opened for reading.
+        _writable - True if the file stream was opened for writing.
+        _owns_stream - True if open created the file stream, so close
+            should close it.
         _input_buffer - A buffer for storing unread from bytes.
         _output_buffer - A buffer for aggregating bits written into bytes.
+        _byte_buf - A buffer for aggregating bytes written to the stream.
+
+    The instance variables are stored in __slots__, so BitFile objects
+    don't have a __dict__.  Subclasses that add their own attributes
+    get a __dict__ unless they declare __slots__ as well.  __weakref__
+    is in __slots__ too, so BitFile objects can still be weakly
+    referenced.
 
     """
 
+    __slots__ = ('_stream', '_mode', '_readable', '_writable',
+                 '_owns_stream', '_input_buffer', '_output_buffer',
+                 '_byte_buf', '__weakref__')
+
     def __init__(self):
         """Constructor for BitFile class.
 
@@ -113,8 +240,12 @@ class BitFile:
             Data elements are initialized as follows:
             _stream = None
             _mode = ''
+            _readable = False
+            _writable = False
+            _owns_stream = False
             _input_buffer = bytearray(b'\x00\x00')
             _output_buffer = bytearray(b'\x00\x00')
+            _byte_buf = bytearray()
 
         Exceptions Raised:
             None.
@@ -124,9 +255,19 @@ class BitFile:
         self._stream = None
         self._mode = ''
 
+        # computed from _mode by open so reads and writes needn't parse it
+        self._readable = False
+        self._writable = False
+
+        # False when open was given a stream that belongs to the caller
+        self._owns_stream = False
+
         # buffers are in the format [bit_count, buffered_bits]
         self._input_buffer = bytearray(2)
         self._output_buffer = bytearray(2)
+
+        # bytes waiting to be written to _stream
+        self._byte_buf = bytearray()
         return
 
     def __del__(self):
@@ -142,8 +283,8 @@ class BitFile:
             None.
 
         Side Effects:
-            If the object's file stream is opened, it will be flushed
-            and closed.
+            If the object's file stream is opened, it will be flushed.
+            It will also be closed unless it was passed in to open.
 
         Exceptions Raised:
             None.
@@ -151,7 +292,10 @@ class BitFile:
         """
 
         if self._stream is not None and not self._stream.closed:
-            self._stream.close()
+            self._flush_byte_buf()
+
+            if self._owns_stream:
+                self._stream.close()
 
     def _verify_opened(self):
         """Raise an exception if the file stream is not opened.
@@ -177,6 +321,85 @@ class BitFile:
             raise ValueError('I/O operation on closed file.')
         return
 
+    def _reset_buf(self, buf):
+        """Zero an input or output buffer in place.
+
+        This method clears the bit count and buffered bits of one of
+        the object's [bit_count, buffered_bits] buffers without
+        allocating a new bytearray.
+
+        Arguments:
+            buf - The buffer to be zeroed (_input_buffer or
+                  _output_buffer).
+
+        Return Value(s):
+            None.
+
+        Side Effects:
+            buf is zeroed.
+
+        Exceptions Raised:
+            None.
+
+        """
+
+        buf[0] = 0
+        buf[1] = 0
+        return
+
+    def _write_bytes(self, data):
+        """Add bytes to the byte buffer.
+
+        This method appends bytes to the byte buffer.  The byte buffer
+        is written to the file stream once it holds _BYTE_BUF_SIZE or
+        more bytes.
+
+        Arguments:
+            data - The bytes to be written.
+
+        Return Value(s):
+            None.
+
+        Side Effects:
+            _byte_buf is updated and may be written to the file stream.
+
+        Exceptions Raised:
+            None.
+
+        """
+
+        self._byte_buf.extend(data)
+
+        if len(self._byte_buf) >= _BYTE_BUF_SIZE:
+            self._flush_byte_buf()
+        return
+
+    def _flush_byte_buf(self):
+        """Write the byte buffer to the file stream.
+
+        This method writes any bytes waiting in the byte buffer to the
+        file stream and empties the byte buffer.
+
+        Arguments:
+            None.
+
+        Return Value(s):
+            None.
+
+        Side Effects:
+            Bytes in _byte_buf are written to the file stream.
+            _byte_buf is emptied.
+
+        Exceptions Raised:
+            None.
+
+        """
+
+        if self._byte_buf:
+            self._stream.write(self._byte_buf)
+            del self._byte_buf[:]
+        return
+
     def _is_readable(self):
         """Returns True if there if the current steam can be read.
 
@@ -197,10 +420,7 @@ class BitFile:
 
         """
 
-        if self._stream is not None and 'r' in self._mode:
-            return True
-        else:
-            return False
+        return self._readable
 
     def _is_writable(self):
         """Returns True if there if the current steam can be read.
@@ -222,13 +442,9 @@ class BitFile:
 
         """
 
-        if self._stream is not None and \
-                any(['w' in self._mode, 'a' in self._mode, '+' in self._mode]):
-            return True
-        else:
-            return False
+        return self._writable
 
-    def open(self, file_name, mode):
+    def open(self, file_name, mode, buffering=524288):
         """Open a BitFile stream.
 
         This method will open the specified file as a BitFile stream.
@@ -236,9 +452,22 @@ class BitFile:
         raised if text mode is requested.  Otherwise the file will be
         explicitly opened in binary mode.
 
+        file_name may also be an already opened binary file object, such
+        as an io.BytesIO.  It is used from its current position and mode
+        only decides whether it is read or written; nothing is truncated.
+        Such a stream belongs to the caller.  close will flush it, but
+        will not close it.
+
         Arguments:
-            file_name - The name of the file to be opened.
-            mode - The mode the file is opened as ('rb', 'wb', 'ab')
+            file_name - The name of the file to be opened, or an opened
+                        binary file object.
+            mode - The mode the file is opened as ('rb', 'wb', 'ab', 'xb')
+            buffering - The size of the file stream's buffer in bytes.
+                        BitFiles make many small reads and writes, so
+                        the default (512 KiB) is larger than Python's.
+                        Larger buffers use more memory, but make fewer
+                        system calls.  Reads larger than the buffer go
+                        directly to the file. (default=524288)
 
         Return Value(s):
             None.
@@ -260,11 +489,20 @@ class BitFile:
                 # Force binary mode in case this we're using ms windows.
                 mode = mode + 'b'
 
-            # open function will throw exception for other invalid modes.
-            self._stream = open(file_name, mode)
+            if not isinstance(file_name, (str, bytes, int, os.PathLike)):
+                # A file object opened by the caller, use it as is.
+                self._stream = file_name
+                self._owns_stream = False
+            else:
+                # open function will throw exception for other invalid modes.
+                self._stream = open(file_name, mode, buffering=buffering)
+                self._owns_stream = True
             self._mode = mode
-            self._input_buffer = bytearray(2)
-            self._output_buffer = bytearray(2)
+            self._readable = 'r' in mode
+            self._writable = any(c in mode for c in 'wax+')
+            self._reset_buf(self._input_buffer)
+            self._reset_buf(self._output_buffer)
+            del self._byte_buf[:]
         else:
             raise ValueError('I/O operation on opened file.')
         return
@@ -274,8 +512,9 @@ class BitFile:
 
         This method will close the specified file as a BitFile stream.
         It's associated bit buffer will be flushed with any spare bits
-        being set to 0.  A ValueError will be raised if the stream is
-        already closed.
+        being set to 0.  A file object that was passed to open is
+        flushed, but left open for the caller.  A ValueError will be
+        raised if the stream is already closed.
 
         Arguments:
             None.
@@ -285,7 +524,9 @@ class BitFile:
 
         Side Effects:
             _stream will be set to None.
+            _owns_stream will be set to False.
             _mode will be cleared.
+            _readable and _writable will be set to False.
             _output_buffer will be zeroed.
 
         Exceptions Raised:
@@ -295,15 +536,20 @@ class BitFile:
 
         self._verify_opened()
 
-        if self._is_writable() and self._output_buffer[0] != 0:
-            # Writable file with buffered bits.  Flush output_buffer.
-            self.flush(False)
+        if self._is_writable():
+            # Writable file.  Flush output_buffer and byte buffer.
+            self.flush(False, sync=True)
+
+        if self._owns_stream:
+            self._stream.close()
 
-        self._stream.close()
         self._stream = None
+        self._owns_stream = False
         self._mode = ''
-        self._input_buffer = bytearray(2)
-        self._output_buffer = bytearray(2)
+        self._readable = False
+        self._writable = False
+        self._reset_buf(self._input_buffer)
+        self._reset_buf(self._output_buffer)
         return
 
     def byte_align(self):
@@ -321,7 +567,8 @@ class BitFile:
             None.
 
         Side Effects:
-            Any buffered bits will be written to an output stream.
+            Any buffered bits and bytes will be written to an output
+            stream.
             All buffers will be zeroed.
 
         Exceptions Raised:
@@ -335,11 +582,12 @@ class BitFile:
 
         if self._is_writable() and self._output_buffer[0] != 0:
             # Write out any unwritten bits.
-            bits = self._output_buffer[1] << (8 - self._output_buffer[0])
-            self._stream.write(chr(bits))
+            bits = self._output_buffer[1] << _LSHIFT[self._output_buffer[0]]
+            self._byte_buf.append(bits & 0xFF)
 
-        self._input_buffer = bytearray(2)
-        self._output_buffer = bytearray(2)
+        self._flush_byte_buf()
+        self._reset_buf(self._input_buffer)
+        self._reset_buf(self._output_buffer)
         return return_value
 
     def seek(self, offset, whence=0):
@@ -372,7 +620,7 @@ class BitFile:
         self.byte_align()
         self._stream.seek(offset, whence)
 
-    def flush(self, ones_fill=False):
+    def flush(self, ones_fill=False, sync=False):
         """Flushes the bit buffer of an output stream.
 
         This method flushes a BitFile's bit buffer, writing it to the
@@ -383,13 +631,18 @@ class BitFile:
         Arguments:
             ones_fill - Set to True if spare bits should be filled with
                         ones. (default=False)
+            sync - Set to True to also flush the underlying file stream.
+                   Otherwise its buffer is left for it to write out when
+                   it fills or the file is closed. (default=False)
 
         Return Value(s):
             None.
 
         Side Effects:
-            Any buffered bits will be written to an output stream.
-            _output_buffer will be zeroed.
+            Any buffered bits and bytes will be written to an output
+            stream.
+            _output_buffer and _byte_buf will be emptied.
+            The file stream will be flushed if sync is True.
 
         Exceptions Raised:
             ValueError - Raised if the stream is not opened.
@@ -402,72 +655,239 @@ class BitFile:
         if not self._is_writable():
             raise IOError(errno.EBADF, 'Bad file descriptor')
 
-        if self._output_buffer[0] == 0:
+        return_value = self._output_buffer[0]
+
+        if return_value == 0 and not self._byte_buf and not sync:
+            # There's nothing to flush.
             return 0
 
-        # There must be unwritten bits.  Write them out.
-        return_value = self._output_buffer[0]
-        bits = bytearray(1)
-        bits[0] = (
-            self._output_buffer[1] << (8 - self._output_buffer[0])) & 0xFF
+        if return_value != 0:
+            # There are unwritten bits.  Write them out.
+            shift = _LSHIFT[self._output_buffer[0]]
+            bits = (self._output_buffer[1] << shift) & 0xFF
 
-        if ones_fill:
-            bits[0] |= (0xFF >> self._output_buffer[0])
+            if ones_fill:
+                bits |= _ONE_FILL[self._output_buffer[0]]
 
-        self._stream.write(bits)
-        self._stream.flush()
-        self._output_buffer = bytearray(2)
+            self._byte_buf.append(bits)
+            self._reset_buf(self._output_buffer)
+
+        self._flush_byte_buf()
+
+        if sync:
+            self._stream.flush()
 
         return return_value
 
-    def get_char(self):
-        """Read the next character from an input stream.
+    def _get_byte(self):
+        """Read the next byte from an input stream as an integer.
 
-        This method reads one character (byte) from the input stream.
+        This method reads one byte from the input stream and merges it
+        with any buffered bits.  It does not verify that the stream is
+        opened and readable.
 
         Arguments:
             None.
 
         Return Value(s):
-            The next character (byte) form an open input stream.
+            The next byte from the input stream as an integer (0 - 255).
 
         Side Effects:
             One byte is read from the input stream.
             _input_buffer is updated appropriately.
 
         Exceptions Raised:
-            ValueError - Raised if the stream is not opened.
-            IOError 9 - Raised if the file cannot read from.
             EOFError - An attempt is made to read past the end of the
                        file.
 
         """
 
-        self._verify_opened()
-
-        if not self._is_readable():
-            raise IOError(errno.EBADF, 'Bad file descriptor')
-
-        return_value = self._stream.read(1)
+        c = self._stream.read(1)
 
-        if return_value == '':
+        if not c:
             raise EOFError
-        else:
-            return_value = ord(return_value)
+
+        c = c[0]
 
         if self._input_buffer[0] == 0:
             # We can just get the byte the from file.
-            return chr(return_value)
+            return c
 
         # We have some buffered bits to return too.
-        tmp = return_value >> self._input_buffer[0]
-        tmp = tmp | self._input_buffer[1] << (8 - self._input_buffer[0])
+        tmp = c >> self._input_buffer[0]
+        tmp = tmp | self._input_buffer[1] << _LSHIFT[self._input_buffer[0]]
+
+        # Put remaining bits in buffer.  Count shouldn't change.
+        self._input_buffer[1] = c
+        return tmp & 0xFF
+
+    def _put_byte(self, v):
+        """Write a byte to an output stream from an integer.
+
+        This method writes one byte to the output stream, merging it
+        with any buffered bits.  It does not verify that the stream is
+        opened and writable.
+
+        Arguments:
+            v - The byte to be written as an integer (0 - 255).
+
+        Return Value(s):
+            None.
+
+        Side Effects:
+            One byte is added to the byte buffer.
+            _output_buffer is updated appropriately.
+
+        Exceptions Raised:
+            ValueError - Raised if v is not in the range 0 - 255.
+
+        """
+
+        if self._output_buffer[0] != 0:
+            tmp = v >> self._output_buffer[0]
+            shift = _LSHIFT[self._output_buffer[0]]
+            tmp |= (self._output_buffer[1] << shift) & 0xFF
+
+            # Put remaining in buffer. count shouldn't change.
+            self._output_buffer[1] = v
+            v = tmp
+
+        self._byte_buf.append(v)
+
+        if len(self._byte_buf) >= _BYTE_BUF_SIZE:
+            self._flush_byte_buf()
+        return
+
+    def _read_bytes(self, count):
+        """Read bytes from an input stream.
+
+        This method reads count bytes from the input stream with a
+        single read and merges them with any buffered bits.  It does
+        not verify that the stream is opened and readable.
+
+        Arguments:
+            count - The number of bytes to read.
+
+        Return Value(s):
+            A bytes or bytearray object containing count bytes.
+
+        Side Effects:
+            count bytes are read from the input stream.
+            _input_buffer is updated appropriately.
+
+        Exceptions Raised:
+            EOFError - An attempt is made to read past the end of the
+                       file.
+
+        """
+
+        chunk = self._stream.read(count)
+
+        if len(chunk) != count:
+            raise EOFError
+
+        if self._input_buffer[0] == 0 or count == 0:
+            # We can just get the bytes the from file.
+            return chunk
+
+        # Merge the buffered bits into the bytes that were read.
+        if _jit_merge_bytes is not None and count >= _JIT_MIN_BYTES:
+            merged = bytearray(count)
+
+            # Put remaining bits in buffer.  Count shouldn't change.
+            self._input_buffer[1] = _jit_merge_bytes(merged, chunk,
+                                                     self._input_buffer[0],
+                                                     self._input_buffer[1])
+            return merged
+
+        merged = _shift_bytes(chunk, self._input_buffer[0],
+                              self._input_buffer[1])
 
         # Put remaining bits in buffer.  Count shouldn't change.
-        self._input_buffer[1] = return_value & 0xFF
-        return_value = tmp & 0xFF
+        self._input_buffer[1] = chunk[-1]
+        return merged
+
+    def _put_bytes(self, data):
+        """Write bytes to an output stream.
+
+        This method writes a block of bytes to the output stream,
+        merging them with any buffered bits.  It does not verify that
+        the stream is opened and writable.
+
+        Arguments:
+            data - The bytes to be written.
 
-        return chr(return_value)
+        Return Value(s):
+            None.
+
+        Side Effects:
+            The bytes are added to the byte buffer.
+            _output_buffer is updated appropriately.
+
+        Exceptions Raised:
+            None.
+
+        """
+
+        if self._output_buffer[0] == 0:
+            # We can just put the bytes to the file.
+            self._write_bytes(data)
+            return
+
+        if not data:
+            return
+
+        # Merge the buffered bits into the bytes being written.
+        if _jit_merge_bytes is not None and len(data) >= _JIT_MIN_BYTES:
+            merged = bytearray(len(data))
+
+            # Put remaining in buffer. count shouldn't change.
+            self._output_buffer[1] = _jit_merge_bytes(merged, data,
+                                                      self._output_buffer[0],
+                                                      self._output_buffer[1])
+        else:
+            merged = _shift_bytes(data, self._output_buffer[0],
+                                  self._output_buffer[1])
+
+            # Put remaining in buffer. count shouldn't change.
+            self._output_buffer[1] = data[-1]
+
+        self._write_bytes(merged)
+        return
+
+    def get_char(self):
+        """Read the next character from an input stream.
+
+        This method reads one character (byte) from the input stream.
+
+        Arguments:
+            None.
+
+        Return Value(s):
+            The next character (byte) form an open input stream.
+
+        Side Effects:
+            One byte is read from the input stream.
+            _input_buffer is updated appropriately.
+
+        Exceptions Raised:
+            ValueError - Raised if the stream is not opened.
+            IOError 9 - Raised if the file cannot read from.
+            EOFError - An attempt is made to read past the end of the
+                       file.
+
+        """
+
+        if not self._readable or self._stream.closed:
+            # Find out if the stream is closed or just not readable.
+            self._verify_opened()
+            raise IOError(errno.EBADF, 'Bad file descriptor')
+
+        if self._byte_buf:
+            # Write pending bytes before reading (r+ mode).
+            self._flush_byte_buf()
+
+        return chr(self._get_byte())
 
     def put_char(self, c):
         """Write a character to an output stream.
@@ -492,33 +912,90 @@ class BitFile:
 
         """
 
-        self._verify_opened()
-
-        if not self._is_writable():
+        if not self._writable or self._stream.closed:
+            # Find out if the stream is closed or just not writable.
+            self._verify_opened()
             raise IOError(errno.EBADF, 'Bad file descriptor')
 
         if not isinstance(c, str):
             c = str(chr(c & 0xFF))
 
-        ba = bytearray(1)
-        ba[0] = ord(c[0])
+        self._put_byte(ord(c[0]))
+        return c[0]
 
-        if self._output_buffer[0] == 0:
-            # We can just put the byte to the file.
-            self._stream.write(ba)
-            return chr(ba[0])
+    def get_chars(self, count):
+        """Read characters from an input stream.
+
+        This method reads count characters (bytes) from the input
+        stream.  They are read with a single read whether or not the
+        stream is byte aligned.
+
+        Arguments:
+            count - The number of characters to read.
+
+        Return Value(s):
+            A string of the next count characters (bytes) from an open
+            input stream.
+
+        Side Effects:
+            count bytes are read from the input stream.
+            _input_buffer is updated appropriately.
+
+        Exceptions Raised:
+            ValueError - Raised if the stream is not opened.
+            IOError 9 - Raised if the file cannot read from.
+            EOFError - An attempt is made to read past the end of the
+                       file.
+
+        """
+
+        if not self._readable or self._stream.closed:
+            # Find out if the stream is closed or just not readable.
+            self._verify_opened()
+            raise IOError(errno.EBADF, 'Bad file descriptor')
+
+        if self._byte_buf:
+            # Write pending bytes before reading (r+ mode).
+            self._flush_byte_buf()
+
+        return self._read_bytes(count).decode('latin-1')
+
+    def put_chars(self, s):
+        """Write characters to an output stream.
 
-        tmp = bytearray(1)
-        tmp[0] = ba[0] >> self._output_buffer[0]
-        tmp[0] |= (
-            self._output_buffer[1] << (8 - self._output_buffer[0])) & 0xFF
+        This method writes a string of characters (bytes) to the output
+        stream.  If the stream is byte aligned the characters are
+        written as a single block.
 
-        self._stream.write(tmp)
+        Arguments:
+            s - The characters to be written.  If s is not a string
+                instance, it must be a bytes like object.
+
+        Return Value(s):
+            The characters that were written.
+
+        Side Effects:
+            len(s) bytes are written to the output stream.
+            _output_buffer is updated appropriately.
 
-        # Put remaining in buffer. count shouldn't change.
-        self._output_buffer[1] = ba[0]
+        Exceptions Raised:
+            ValueError - Raised if the stream is not opened or s
+                         contains a character that isn't a byte.
+            IOError 9 - Raised if the file cannot written to.
 
-        return chr(ba[0])
+        """
+
+        if not self._writable or self._stream.closed:
+            # Find out if the stream is closed or just not writable.
+            self._verify_opened()
+            raise IOError(errno.EBADF, 'Bad file descriptor')
+
+        if isinstance(s, str):
+            self._put_bytes(s.encode('latin-1'))
+        else:
+            self._put_bytes(s)
+
+        return s
 
     def get_bit(self):
         """Read the next bit from an input stream.
@@ -544,19 +1021,23 @@ class BitFile:
 
         """
 
-        self._verify_opened()
-
-        if not self._is_readable():
+        if not self._readable or self._stream.closed:
+            # Find out if the stream is closed or just not readable.
+            self._verify_opened()
             raise IOError(errno.EBADF, 'Bad file descriptor')
 
+        if self._byte_buf:
+            # Write pending bytes before reading (r+ mode).
+            self._flush_byte_buf()
+
         if self._input_buffer[0] == 0:
             # The buffer is empty, read another character.
             c = self._stream.read(1)
 
-            if c == '':
+            if not c:
                 raise EOFError
             else:
-                self._input_buffer[1] = ord(c)
+                self._input_buffer[1] = c[0]
 
             self._input_buffer[0] = 8
 
@@ -588,9 +1069,9 @@ class BitFile:
 
         """
 
-        self._verify_opened()
-
-        if not self._is_writable():
+        if not self._writable or self._stream.closed:
+            # Find out if the stream is closed or just not writable.
+            self._verify_opened()
             raise IOError(errno.EBADF, 'Bad file descriptor')
 
         self._output_buffer[0] = self._output_buffer[0] + 1
@@ -604,10 +1085,11 @@ class BitFile:
 
         # Write bit the buffer if we have 8 bits.
         if self._output_buffer[0] == 8:
-            tmp = bytearray(1)
-            tmp[0] = self._output_buffer[1]
-            self._stream.write(tmp)
-            self._output_buffer = bytearray(2)
+            self._byte_buf.append(self._output_buffer[1])
+            self._output_buffer[0] = 0
+
+            if len(self._byte_buf) >= _BYTE_BUF_SIZE:
+                self._flush_byte_buf()
 
         return bit
 
@@ -640,35 +1122,56 @@ class BitFile:
 
         """
 
-        self._verify_opened()
-
-        if not self._is_readable():
+        if not self._readable or self._stream.closed:
+            # Find out if the stream is closed or just not readable.
+            self._verify_opened()
             raise IOError(errno.EBADF, 'Bad file descriptor')
 
-        remaining = count
-        values = []
+        if self._byte_buf:
+            # Write pending bytes before reading (r+ mode).
+            self._flush_byte_buf()
 
-        # Read whole bytes.
-        while remaining >= 8:
-            values.insert(0, ord(self.get_char()))
-            remaining = remaining - 8
+        if self._input_buffer[0] == 0 and (count & 0x07) == 0:
+            # Byte aligned whole bytes.  Just read them, LSByte first.
+            return int.from_bytes(self._read_bytes(count >> 3), 'little')
+
+        remaining = count & 0x07
+        whole = count >> 3
+
+        if whole == 1:
+            # Just one whole byte, merge it without building bytes.
+            return_value = self._get_byte()
+        elif whole > 0:
+            # Read all of the whole bytes at once.  The first byte read
+            # is the LSByte.
+            return_value = int.from_bytes(self._read_bytes(whole), 'little')
+        else:
+            return_value = 0
 
         if remaining != 0:
             # Read all remaining bits.
-            last = 0
+            if remaining <= self._input_buffer[0]:
+                # The bit buffer holds all of the bits we need.
+                self._input_buffer[0] = self._input_buffer[0] - remaining
+                last = self._input_buffer[1] >> self._input_buffer[0]
+                last = last & _LOW_MASK[remaining]
+            else:
+                # Take what's buffered and the rest from the next byte.
+                c = self._stream.read(1)
 
-            while remaining > 0:
-                last = last << 1
-                if self.get_bit():
-                    last = last | 0x01
-                remaining = remaining - 1
+                if not c:
+                    raise EOFError
 
-            values.insert(0, last)
+                needed = remaining - self._input_buffer[0]
+                last = self._input_buffer[1] & \
+                    _LOW_MASK[self._input_buffer[0]]
+                last = (last << needed) | (c[0] >> _LSHIFT[needed])
 
-        return_value = 0
+                self._input_buffer[0] = _LSHIFT[needed]
+                self._input_buffer[1] = c[0]
 
-        for v in values:
-            return_value = (return_value << 8) + v
+            # The remaining bits are the MSBits.
+            return_value = return_value | (last << (8 * whole))
 
         return return_value
 
@@ -701,30 +1204,185 @@ class BitFile:
 
         """
 
-        self._verify_opened()
-
-        if not self._is_writable():
+        if not self._writable or self._stream.closed:
+            # Find out if the stream is closed or just not writable.
+            self._verify_opened()
             raise IOError(errno.EBADF, 'Bad file descriptor')
 
         if not isinstance(bits, int):
             raise TypeError('Bits must be in integer type')
 
-        remaining = count
+        if self._output_buffer[0] == 0 and (count & 0x07) == 0:
+            # Byte aligned whole bytes.  Just write them, LSByte first.
+            self._write_bytes(
+                (bits & ((1 << count) - 1)).to_bytes(count >> 3, 'little'))
+            return count
+
+        whole = count >> 3
+        remaining = count & 0x07
 
-        ba = int_to_bytearray(bits, (count + 7) // 8)
+        # LSByte is index 0.  Drop any bits beyond count so they fit.
+        ba = (bits & ((1 << count) - 1)).to_bytes((count + 7) // 8, 'little')
 
         # Write whole bytes.
-        while remaining >= 8:
-            return_value = self.put_char(ba.pop())
-            remaining -= 8
+        if whole > 0:
+            self._put_bytes(ba[:whole])
 
         if remaining != 0:
             # Write the remaining bits.
-            tmp = ba[0]
-            tmp = tmp << (8 - remaining)
-            while remaining > 0:
-                self.put_bit(tmp & 0x80)
-                tmp = tmp << 1
-                remaining = remaining - 1
+            tmp = ba[whole]
+            space = _LSHIFT[self._output_buffer[0]]
+
+            if remaining < space:
+                # The bits fit in the bit buffer.
+                self._output_buffer[1] = \
+                    ((self._output_buffer[1] << remaining) | tmp) & 0xFF
+                self._output_buffer[0] = self._output_buffer[0] + remaining
+            else:
+                # Fill the bit buffer, write it, and buffer what's left.
+                leftover = remaining - space
+                c = ((self._output_buffer[1] << space) | (tmp >> leftover))
+                self._byte_buf.append(c & 0xFF)
+
+                if len(self._byte_buf) >= _BYTE_BUF_SIZE:
+                    self._flush_byte_buf()
+
+                self._output_buffer[0] = leftover
+                self._output_buffer[1] = tmp & _LOW_MASK[leftover]
 
         return count
+
+    def put_bits_stream(self, codes):
+        """Write a sequence of codes to an output stream.
+
+        This method writes each (bits, count) pair in codes to the
+        output stream exactly as put_bits(bits, count) would, but all
+        of the codes are packed in a single call.  It is intended for
+        encoders that emit many small variable width codes.
+
+        Arguments:
+            codes - an iterable of (bits, count) pairs, where bits is
+                    an integer object containing the bits to be written
+                    and count is the number of bits to be written.
+
+        Return Value(s):
+            The total number of bits written.
+
+        Side Effects:
+            The codes will be written to the output stream and/or bit
+            buffer.
+            _output_buffer is updated appropriately.
+
+        Exceptions Raised:
+            ValueError - Raised if the stream is not opened.
+            IOError 9 - Raised if the file cannot written to.
+            TypeError - Raised if any bits is not an integer object.
+                        Codes preceding it will have been written.
+
+        """
+
+        if not self._writable or self._stream.closed:
+            # Find out if the stream is closed or just not writable.
+            self._verify_opened()
+            raise IOError(errno.EBADF, 'Bad file descriptor')
+
+        if _bitcore is not None:
+            # Let the C extension do the packing.  It flushes the byte
+            # buffer at the same size the python loop below does.
+            return _bitcore.put_codes(codes, self._byte_buf,
+                                      self._output_buffer, _BYTE_BUF_SIZE,
+                                      self._flush_byte_buf)
+
+        # acc holds nbits bits that haven't been written yet.
+        nbits = self._output_buffer[0]
+        acc = self._output_buffer[1] & _LOW_MASK[nbits]
+        buf = self._byte_buf
+        total = 0
+
+        try:
+            for bits, count in codes:
+                if not isinstance(bits, int):
+                    raise TypeError('Bits must be in integer type')
+
+                if count <= 8:
+                    bits = bits & _LOW_MASK[count]
+                elif count < 16:
+                    # put_bits writes the low byte, then the remaining
+                    # msbits.  Swap them with shifts, no bytes needed.
+                    remaining = count - 8
+                    bits = ((bits & 0xFF) << remaining) | \
+                        ((bits >> 8) & _LOW_MASK[remaining])
+                else:
+                    # put_bits writes whole bytes LSByte first, then the
+                    # remaining msbits.  Reorder the code to match.
+                    whole = count >> 3
+                    remaining = count & 0x07
+                    ba = (bits & ((1 << (8 * whole)) - 1)).to_bytes(
+                        whole, 'little')
+                    bits = (int.from_bytes(ba, 'big') << remaining) | \
+                        ((bits >> (8 * whole)) & _LOW_MASK[remaining])
+
+                acc = (acc << count) | bits
+                nbits += count
+                total += count
+
+                if nbits >= 64:
+                    # Move all of the whole bytes to the byte buffer.
+                    whole = nbits >> 3
+                    nbits = nbits & 0x07
+                    buf += (acc >> nbits).to_bytes(whole, 'big')
+                    acc = acc & _LOW_MASK[nbits]
+
+                    if len(buf) >= _BYTE_BUF_SIZE:
+                        self._flush_byte_buf()
+        finally:
+            # Write whole bytes and keep the rest in the bit buffer.
+            whole = nbits >> 3
+
+            if whole > 0:
+                nbits = nbits & 0x07
+                self._write_bytes((acc >> nbits).to_bytes(whole, 'big'))
+                acc = acc & _LOW_MASK[nbits]
+
+            self._output_buffer[0] = nbits
+            self._output_buffer[1] = acc
+
+        return total
+
+    def put_bits_many(self, values, widths):
+        """Write a sequence of values with their widths to an output stream.
+
+        This method writes each value in values using the matching
+        width from widths, exactly as put_bits(value, width) would for
+        each pair.  The values are packed in a single call to
+        put_bits_stream.  A ValueError is raised, before anything is
+        written, if values and widths aren't the same length.
+
+        Arguments:
+            values - a sequence of integer objects containing the bits
+                     to be written.
+            widths - a sequence of the number of bits to be written for
+                     each value.
+
+        Return Value(s):
+            The total number of bits written.
+
+        Side Effects:
+            The values will be written to the output stream and/or bit
+            buffer.
+            _output_buffer is updated appropriately.
+
+        Exceptions Raised:
+            ValueError - Raised if the stream is not opened.
+            ValueError - Raised if values and widths have different
+                         lengths.
+            IOError 9 - Raised if the file cannot written to.
+            TypeError - Raised if any value is not an integer object.
+                        Values preceding it will have been written.
+
+        """
+
+        if len(values) != len(widths):
+            raise ValueError('values and widths must be the same length.')
+
+        return self.put_bits_stream(zip(values, widths))
@@ -58,145 +58,382 @@ Reading 12 bits MS byte to LS byte:
      0x666
 Reading bits:
      101010
+
+The same tests through files on disk, read back with a small buffer so
+reads refill it and large reads bypass it.  These run quietly, only
+errors are printed:
+
+>>> file_example(15, buffering=4)
+
+A file object passed to open belongs to the caller.  close flushes it,
+but leaves it open.  Once the caller closes it, it can't be used:
+
+>>> buf = io.BytesIO()
+>>> bf = bitfile.BitFile()
+>>> bf.open(buf, 'w')
+>>> bf.put_chars('AB')
+'AB'
+>>> bf.close()
+>>> buf.closed, buf.getvalue()
+(False, b'AB')
+>>> bf.open(buf, 'a')
+>>> buf.close()
+>>> bf.put_char('C')
+Traceback (most recent call last):
+    ...
+ValueError: I/O operation on closed file.
+
+put_bits_many needs a width for every value.  Nothing is written if
+the lengths don't match:
+
+>>> bf.open(io.BytesIO(), 'w')
+>>> bf.put_bits_many([0x111, 0x222], [12])
+Traceback (most recent call last):
+    ...
+ValueError: values and widths must be the same length.
+
+put_packed packs values with pack_bits, which is compiled by numba when
+it's installed, and writes the result in two calls:
+
+>>> packed_example(3)
+     0x111
+     0x222
+     0x333
+
+put_bits_stream writes exactly what put_bits does for each code.  This
+checks widths 1 - 70 at every starting bit offset, on the C extension
+too when it's built:
+
+>>> stream_check()
+
+flush(sync=True) also flushes the file stream, so another reader sees
+the data before the BitFile is closed:
+
+>>> sync_example()
+7
+b'SyncB'
 """
 
-from __future__ import print_function
 import sys
 import os
+import io
+import random
+import tempfile
+from functools import lru_cache
 import bitfile
 
+try:
+    from numba import njit
+    import numpy as np
+except ImportError:
+    # numba is optional, pack_bits just runs as plain python without it.
+    njit = None
+
 NUM_CALLS = 6
 
 
-def example(num_calls):
+@lru_cache(maxsize=None)
+def _char_seq(n):
+    # The characters written and read back: 'ABC...Z', repeated as
+    # often as needed for n characters.
+    return bytes(0x41 + i % 26 for i in range(n)).decode('latin-1')
+
+
+@lru_cache(maxsize=None)
+def _hex_seq(n):
+    # The 12-bit values written and read back: 0x111, 0x222, ... 0xfff,
+    # then wrapping to 12 bits (0x110, 0x221, ...) for larger n.
+    # A tuple, so the cached sequence can't be modified by a caller.
+    return tuple((0x111 * (i + 1)) & 0xFFF for i in range(n))
+
+
+def pack_bits(values, widths, out):
+    # Pack each value into out LSB first, the same order that
+    # put_bits(bits, count) uses for an integer holding all of them.
+    # Returns the number of bytes filled and the leftover bits + count.
+    acc = 0
+    nbits = 0
+    idx = 0
+    for i in range(len(values)):
+        acc = acc | ((values[i] & ((1 << widths[i]) - 1)) << nbits)
+        nbits = nbits + widths[i]
+        while nbits >= 8:
+            out[idx] = acc & 0xFF
+            acc = acc >> 8
+            nbits = nbits - 8
+            idx = idx + 1
+    return idx, acc, nbits
+
+
+if njit is not None:
+    # The undecorated version is still available as pack_bits.py_func.
+    pack_bits = njit(cache=True)(pack_bits)
+
+
+def put_packed(bf, values, widths):
+    # Write values with pack_bits: whole bytes in one put_chars call,
+    # then the leftover bits.
+    size = (sum(widths) + 7) // 8
+    if njit is not None:
+        out = np.zeros(size, np.uint8)
+        count, bits, nbits = pack_bits(np.array(values, np.int64),
+                                       np.array(widths, np.int64), out)
+        out = out.tobytes()
+    else:
+        out = bytearray(size)
+        count, bits, nbits = pack_bits(values, widths, out)
+    bf.put_chars(out[:count])
+    bf.put_bits(bits, nbits)
+
+
+def print_hex(values):
+    # Print each value in hex on its own line, like print('    ', hex(v)).
+    # doctest captures print, so it gets print.  Otherwise the lines are
+    # written to stdout's binary buffer all at once.
+    out = getattr(sys.stdout, 'buffer', None)
+    if out is None or 'doctest' in sys.modules:
+        for v in values:
+            print('    ', hex(v))
+        return
+
+    # Write out anything print left in the text layer first.
+    sys.stdout.flush()
+    out.write(b''.join(b'     %s\n' % hex(v).encode() for v in values))
+
+
+def example(num_calls, verbose=True):
     bf = bitfile.BitFile()
 
+    # The bit file is kept in memory.  close leaves it open for reuse.
+    buf = io.BytesIO()
+
     # Open bit file for writing.
-    bf.open('testfile', 'w')
-    write_test(bf, num_calls)
+    bf.open(buf, 'w')
+    write_test(bf, num_calls, verbose)
     bf.close()
 
     # Now read back writes
 
-    # Open bit file for reading.
-    bf.open('testfile', 'r')
-    read_test(bf, num_calls)
+    # Open bit file for reading from the beginning.
+    buf.seek(0)
+    bf.open(buf, 'r')
+    read_test(bf, num_calls, verbose)
 
     bf.close()
 
-    # Open bit file for reading and writing.
-    bf.open('testfile', 'r+')
-    write_test(bf, num_calls)
+    # Open bit file for reading and writing from the beginning.
+    buf.seek(0)
+    bf.open(buf, 'r+')
+    write_test(bf, num_calls, verbose)
 
     # Now read back writes
 
     # Go back to the beginning of the file (it was opened with r+).
     bf.seek(0)
-    read_test(bf, num_calls)
+    read_test(bf, num_calls, verbose)
 
     bf.close()
-    os.remove('testfile')
 
 
-def write_test(bf, num_calls):
-    # Write chars
-    value = 'A'
-    print('Writing characters:\n     ', end='')
-    for i in range(num_calls):
-        print(value, end='')
-        bf.put_char(value)
-        value = chr(ord(value) + 1)
-    print('')
+def file_example(num_calls, buffering=-1, verbose=False):
+    # Run the tests of example on a temporary file.
+    fd, name = tempfile.mkstemp()
+    os.close(fd)
 
-    # Write single bits
+    try:
+        bf = bitfile.BitFile()
+
+        bf.open(name, 'w', buffering)
+        write_test(bf, num_calls, verbose)
+        bf.close()
+
+        bf.open(name, 'r', buffering)
+        read_test(bf, num_calls, verbose)
+        bf.close()
+
+        # Overwrite the file, then seek back and read it again.
+        bf.open(name, 'r+', buffering)
+        write_test(bf, num_calls, verbose)
+        bf.seek(0)
+        read_test(bf, num_calls, verbose)
+
+        # Read a little, then seek relative to where reading stopped.
+        bf.seek(0)
+        bf.get_char()
+        bf.seek(-1, 1)
+        read_test(bf, num_calls, verbose)
+        bf.close()
+    finally:
+        os.remove(name)
+
+
+def packed_example(num_calls):
+    # Write the 12-bit values with put_packed, then read them all back
+    # as one integer.  That's the layout pack_bits produces.
+    values = _hex_seq(num_calls)
+    buf = io.BytesIO()
+    bf = bitfile.BitFile()
+
+    bf.open(buf, 'w')
+    put_packed(bf, values, [12] * num_calls)
+    bf.close()
+
+    buf.seek(0)
+    bf.open(buf, 'r')
+    bits = bf.get_bits(12 * num_calls)
+    bf.close()
+    print_hex([(bits >> (12 * i)) & 0xFFF for i in range(num_calls)])
+
+
+def stream_check():
+    # Compare put_bits_stream to one put_bits call per code, with plain
+    # python and with the C extension if it's built.  Only mismatches
+    # are printed.
+    module = sys.modules[bitfile.BitFile.__module__]
+    saved = module._bitcore
+    backends = [('python', None)]
+    if saved is not None:
+        backends.append(('C', saved))
+
+    try:
+        for name, core in backends:
+            module._bitcore = core
+            for width in range(1, 71):
+                # A couple of extra bits checks that they're masked.
+                rand = random.Random(width)
+                codes = [(rand.getrandbits(width + 2), width)
+                         for i in range(20)]
+                codes.append(((1 << width) - 1, width))
+
+                for offset in range(8):
+                    expected = io.BytesIO()
+                    bf = bitfile.BitFile()
+                    bf.open(expected, 'w')
+                    bf.put_bits(0x55, offset)
+                    for bits, count in codes:
+                        bf.put_bits(bits, count)
+                    bf.close()
+
+                    got = io.BytesIO()
+                    bf.open(got, 'w')
+                    bf.put_bits(0x55, offset)
+                    bf.put_bits_stream(codes)
+                    bf.close()
+
+                    if got.getvalue() != expected.getvalue():
+                        print('Error:', name, 'put_bits_stream width',
+                              width, 'offset', offset)
+    finally:
+        module._bitcore = saved
+
+
+def sync_example():
+    # Write 'Sync' and 7 more bits, then sync and read the file
+    # separately while the BitFile still has it open.
+    fd, name = tempfile.mkstemp()
+    os.close(fd)
+
+    try:
+        bf = bitfile.BitFile()
+        bf.open(name, 'w')
+        bf.put_chars('Sync')
+        bf.put_bits(0x21, 7)
+        print(bf.flush(sync=True))
+
+        with open(name, 'rb') as f:
+            print(f.read())
+
+        bf.close()
+    finally:
+        os.remove(name)
+
+
+def write_test(bf, num_calls, verbose=True):
+    # Write chars, all at once
+    value = _char_seq(num_calls)
+    if verbose:
+        print('Writing characters:\n     ' + value)
+    bf.put_chars(value)
+
+    # Write single bits, collected into one integer
     value = 1
-    print('Writing bits:\n     ', end='')
+    digits = []
     for i in range(num_calls):
-        print(value, end='')
-        bf.put_bit(value)
-        value = 1 - value
-    print('')
-
-    # Write some bits from an integer (LSByte to MSByte).
-    value = 0x111
-    print('Writing 12 bits LS byte to MS byte:')
-    for i in range(num_calls):
-        print('    ', hex(value))
-        bf.put_bits(value, 12)
-        value = value + 0x111
+        digits.append(str(value))
+        value ^= 1
+    digits = ''.join(digits)
+    if verbose:
+        print('Writing bits:\n     ' + digits)
+    # Converting the digits is linear, shifting each bit in isn't.
+    bf.put_bits(int(digits or '0', 2), num_calls)
+
+    # Write some bits from an integer (LSByte to MSByte), 12 bits per
+    # value, all in one put_bits_many call.
+    values = _hex_seq(num_calls)
+    if verbose:
+        print('Writing 12 bits LS byte to MS byte:')
+        print_hex(values)
+    bf.put_bits_many(values, [12] * num_calls)
 
     # Write single bits
     value = 1
-    print('Writing bits:\n     ', end='')
+    digits = []
+    put_bit = bf.put_bit
     for i in range(num_calls):
-        print(value, end='')
-        bf.put_bit(value)
-        value = 1 - value
-    print('')
+        digits.append(str(value))
+        put_bit(value)
+        value ^= 1
+    if verbose:
+        print('Writing bits:\n     ' + ''.join(digits))
 
     # Write out any remaining bits.
     bf.flush()
 
 
-def read_test(bf, num_calls):
-    # Read chars
-    print('Reading characters:\n     ', end='')
-    expected = 'A'
-    for i in range(num_calls):
-        try:
-            value = bf.get_char()
-            if value != expected:
-                print('\nError: Got:', value, 'Expected:', expected, '\n')
-        except:
-            print('Error: reading char')
-            bf.close()
-            exit()
-        else:
-            print(value, end='')
-        expected = chr(ord(expected) + 1)
-    print('')
-
-    # Read single bits
-    print('Reading bits:\n     ', end='')
-    for i in range(num_calls):
-        try:
-            value = bf.get_bit()
-        except:
-            print('Error: reading bits')
-            bf.close()
-            exit()
-        else:
-            print(value, end='')
-    print('')
-
-    # Read some bits into an integer (LSByte to MSByte).
-    expected = 0x111
-    print('Reading 12 bits MS byte to LS byte:')
-    for i in range(num_calls):
-        try:
-            value = bf.get_bits(12)
-            if value != expected:
-                print('\nError: Got:', value, 'Expected:', expected, '\n')
-        except:
-            print('Error: reading bits from LSByte to MSByte')
-            bf.close()
-            exit()
-        else:
-            print('    ', hex(value))
-        expected = expected + 0x111
+def read_test(bf, num_calls, verbose=True):
+    # Any read error aborts the test, so one handler covers all of them.
+    try:
+        # Read chars, all at once
+        expected = _char_seq(num_calls)
+        value = bf.get_chars(num_calls)
+        if value != expected:
+            print('\nError: Got:', value, 'Expected:', expected, '\n')
+        if verbose:
+            print('Reading characters:\n     ' + value)
 
-    # Read single bits
-    print('Reading bits:\n     ', end='')
-    for i in range(num_calls):
+        # Read single bits, all at once
+        bits = bf.get_bits(num_calls)
+        digits = format(bits, 'b').zfill(num_calls) if num_calls else ''
+        if verbose:
+            print('Reading bits:\n     ' + digits)
+
+        # Read some bits into an integer (LSByte to MSByte)
+        values = _hex_seq(num_calls)
+        if verbose:
+            print('Reading 12 bits MS byte to LS byte:')
+        get_bits = bf.get_bits
+        got = [get_bits(12) for i in range(num_calls)]
+        for i in range(num_calls):
+            if got[i] != values[i]:
+                print('\nError: Got:', got[i], 'Expected:', values[i], '\n')
+        if verbose:
+            print_hex(got)
+
+        # Read single bits
+        digits = []
+        get_bit = bf.get_bit
+        for i in range(num_calls):
+            digits.append(str(get_bit()))
+        if verbose:
+            print('Reading bits:\n     ' + ''.join(digits))
+    except (IOError, EOFError, ValueError) as e:
+        print('Error: reading bit file:', repr(e))
         try:
-            value = bf.get_bit()
-        except:
-            print('Error: reading bits')
             bf.close()
-            exit()
-        else:
-            print(value, end='')
-    print('')
+        except (IOError, ValueError):
+            # The stream may be what failed.  Don't hide e behind it.
+            pass
+        sys.exit(1)
 
 if __name__ == "__main__":
     import doctest
@@ -1,35 +1,44 @@
-from distutils.core import setup
+"""Builds the optional _bitcore C extension.
 
-with open('README') as file:
-    __desc__ = file.read()
+The package metadata lives in pyproject.toml.  This script is only needed
+to build _bitcore.pyx when Cython is available.
+"""
 
+from setuptools import setup, Extension
+from setuptools.command.build_ext import build_ext
+from setuptools.errors import BaseError, CCompilerError
 
-__classifiers__ = [
-    'Development Status :: 4 - Beta',
-    'License :: OSI Approved :: GNU General Public License (GPL)',
-    'Operating System :: OS Independent',
-    'Programming Language :: Python',
-    'Environment :: Console',
-    'Intended Audience :: Developers',
-    'Topic :: Software Development :: Libraries :: Python Modules',
-    'Topic :: System :: Archiving :: Compression',
-    'Topic :: Utilities',
-]
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    # The C extension is optional.  Without Cython it isn't built.
+    cythonize = None
 
-module_description = \
-    'Module for reading/writing an arbitrary number of bits from a file.'
+
+class optional_build_ext(build_ext):
+    """build_ext that skips the C extension if it can't be compiled."""
+
+    def run(self):
+        try:
+            build_ext.run(self)
+        except (CCompilerError, BaseError) as e:
+            print('Skipping optional C extension:', e)
+
+    def build_extension(self, ext):
+        try:
+            build_ext.build_extension(self, ext)
+        except (CCompilerError, BaseError) as e:
+            print('Skipping optional C extension:', e)
+
+
+if cythonize is not None:
+    __ext_modules__ = cythonize(
+        [Extension('bitfile._bitcore', ['bitfile/_bitcore.pyx'])],
+        language_level=3)
+else:
+    __ext_modules__ = []
 
 setup(
-    name='bitfile',
-    version='0.3',
-    description=module_description,
-    author='Michael Dipperstein',
-    author_email='mdipperstein@gmail.com',
-    license='GPL',
-    url='https://michaeldipperstein.github.io/bitfile.html',
-    packages=['bitfile', ],
-    package_data={'bitfile': ['COPYING', 'README']},
-    platforms='All platforms',
-    long_description=__desc__,
-    classifiers=__classifiers__,
+    ext_modules=__ext_modules__,
+    cmdclass={'build_ext': optional_build_ext},
 )